@@ -3,18 +3,25 @@ from fastapi.responses import FileResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 import os
+import stat
 import logging
 from pathlib import Path
+from urllib.parse import urlparse
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List
+from typing import List, Optional
 import uuid
 from datetime import datetime, timezone
 import re
 import asyncio
-from playwright.async_api import async_playwright
+import time
+import hashlib
+import itertools
+from playwright.async_api import async_playwright, Browser, Route
 from openpyxl import Workbook
 from openpyxl.drawing.image import Image as XLImage
+from openpyxl.utils import get_column_letter
 from PIL import Image
 import io
 import tempfile
@@ -34,9 +41,71 @@ os.environ['PLAYWRIGHT_BROWSERS_PATH'] = '/pw-browsers'
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)  # Return BSON dates as UTC-aware datetimes
 db = client[os.environ['DB_NAME']]
 
+# Maximum number of pages captured at once across all requests
+MAX_CONCURRENT_SCREENSHOTS = int(os.environ.get('MAX_CONCURRENT_SCREENSHOTS', '4'))
+if MAX_CONCURRENT_SCREENSHOTS < 1:
+    raise ValueError(f"MAX_CONCURRENT_SCREENSHOTS must be at least 1, got {MAX_CONCURRENT_SCREENSHOTS}")
+SCREENSHOT_SEM = asyncio.Semaphore(MAX_CONCURRENT_SCREENSHOTS)
+
+# Valid speedtest.net result links
+SPEEDTEST_URL_RE = re.compile(r'^https://www\.speedtest\.net/my-result/[adi]/\d+$')
+
+# Status checks are inserted in batches of this size, or after this many seconds
+STATUS_FLUSH_SIZE = 64
+STATUS_FLUSH_INTERVAL = 0.1
+# Maximum number of status checks returned by GET /api/status
+STATUS_LIST_LIMIT = 1000
+# Upper bound on buffered status checks kept for retry while MongoDB is unavailable
+STATUS_BUFFER_MAX = 10_000
+# Maximum seconds spent flushing buffered status checks during shutdown
+STATUS_SHUTDOWN_TIMEOUT = 5
+
+# Chromium launch flags for the shared headless browser
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+]
+
+# JPEG quality for captured result screenshots
+SCREENSHOT_QUALITY = 80
+
+# On-disk screenshot cache, keyed by sha256 of the result URL
+SCREENSHOT_CACHE_DIR = Path("/tmp/speedtest_cache")
+SCREENSHOT_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
+
+# Ad and analytics hosts (and their subdomains) that never contribute to the result card.
+# Only these are blocked so speedtest's own assets, including its CDN, always load.
+BLOCKED_HOSTS = {
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googletagservices.com',
+    'googletagmanager.com',
+    'google-analytics.com',
+    'adservice.google.com',
+    'amazon-adsystem.com',
+    'adnxs.com',
+    'adsrvr.org',
+    'casalemedia.com',
+    'criteo.com',
+    'criteo.net',
+    'moatads.com',
+    'openx.net',
+    'pubmatic.com',
+    'rubiconproject.com',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'taboola.com',
+    'outbrain.com',
+    'hotjar.com',
+    'facebook.net',
+}
+
 # Create the main app without a prefix
 app = FastAPI()
 
@@ -74,50 +143,146 @@ async def create_status_check(input: StatusCheckCreate):
     status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
     
-    # Convert to dict and serialize datetime to ISO string for MongoDB
+    # Convert to dict; motor stores the datetime natively as a BSON date
     doc = status_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
     
-    _ = await db.status_checks.insert_one(doc)
+    # Buffer the insert; it is written in a batch by flush_status_buffer
+    async with app.state.status_lock:
+        if not app.state.status_buffer:
+            app.state.status_buffer_since = time.monotonic()
+        app.state.status_buffer.append(doc)
+        should_flush = (
+            len(app.state.status_buffer) >= STATUS_FLUSH_SIZE
+            or time.monotonic() - app.state.status_buffer_since >= STATUS_FLUSH_INTERVAL
+        )
+    
+    if should_flush:
+        await flush_status_buffer()
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    # Exclude MongoDB's _id field from the query results
-    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
+def requeue_status_checks(docs: List[dict]):
+    """Put status checks that failed to insert back at the front of the buffer.
+    
+    Deliberately synchronous: with no await it runs atomically on the event loop,
+    so it needs no lock and is safe to call while a flush is being cancelled.
+    """
+    buffer = docs + app.state.status_buffer
+    if len(buffer) > STATUS_BUFFER_MAX:
+        dropped = len(buffer) - STATUS_BUFFER_MAX
+        logger.error(f"Status check buffer full, dropping {dropped} oldest status checks")
+        buffer = buffer[dropped:]
+    if not app.state.status_buffer:
+        app.state.status_buffer_since = time.monotonic()
+    app.state.status_buffer = buffer
+
+
+async def flush_status_buffer():
+    """Write all buffered status checks to MongoDB with a single insert_many"""
+    async with app.state.status_lock:
+        batch = app.state.status_buffer
+        app.state.status_buffer = []
     
-    # Convert ISO string timestamps back to datetime objects
-    for check in status_checks:
-        if isinstance(check['timestamp'], str):
-            check['timestamp'] = datetime.fromisoformat(check['timestamp'])
+    if not batch:
+        return
     
-    return status_checks
+    try:
+        await db.status_checks.insert_many(batch, ordered=False)
+    except BulkWriteError as e:
+        # Documents keep the _id assigned on the first attempt, so duplicate key errors
+        # mean they were already written; other write errors won't succeed on retry
+        failed = {err['index']: err for err in e.details.get('writeErrors', [])}
+        rejected = [idx for idx, err in failed.items() if err.get('code') != 11000]
+        if rejected:
+            logger.error(f"Dropping {len(rejected)} status checks rejected by MongoDB: {str(e)}")
+        if e.details.get('writeConcernErrors'):
+            # Not confirmed as written, retry everything that didn't fail outright
+            requeue_status_checks([doc for idx, doc in enumerate(batch) if idx not in failed])
+    except asyncio.CancelledError:
+        # Cancelled mid-insert (shutdown timeout); keep the batch so it is accounted for
+        requeue_status_checks(batch)
+        raise
+    except Exception as e:
+        logger.error(f"Error flushing {len(batch)} status checks, will retry: {str(e)}")
+        requeue_status_checks(batch)
 
 
-def validate_speedtest_url(url: str) -> bool:
-    """Validate if URL is a valid speedtest.net result link"""
-    pattern = r'^https://www\.speedtest\.net/my-result/(a|d|i)/\d+$'
-    return bool(re.match(pattern, url.strip()))
+async def flush_status_buffer_periodically():
+    """Drain the status check buffer every STATUS_FLUSH_INTERVAL seconds until stopped"""
+    stop = app.state.status_flush_stop
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), STATUS_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        await flush_status_buffer()
 
+@api_router.get("/status", response_model=List[StatusCheck])
+async def get_status_checks():
+    # Project only the model fields (excluding MongoDB's _id), capped like the original to_list(1000)
+    cursor = db.status_checks.find(
+        {}, {"_id": 0, "id": 1, "client_name": 1, "timestamp": 1}
+    ).limit(STATUS_LIST_LIMIT)
+    return [StatusCheck(**check) async for check in cursor]
 
-async def capture_speedtest_screenshot(url: str) -> bytes:
-    """Capture screenshot of speedtest result page"""
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=['--no-sandbox', '--disable-setuid-sandbox']
-        )
-        
+
+async def launch_browser() -> Browser:
+    """Launch the shared headless Chromium instance, starting Playwright if needed"""
+    if app.state.pw is None:
+        app.state.pw = await async_playwright().start()
+    return await app.state.pw.chromium.launch(
+        headless=True,
+        args=BROWSER_ARGS
+    )
+
+
+async def get_browser() -> Browser:
+    """Return the shared browser, launching it on first use or after a crash/disconnect"""
+    async with app.state.browser_lock:
+        if app.state.browser is None or not app.state.browser.is_connected():
+            if app.state.browser is not None:
+                logger.warning("Shared browser disconnected, relaunching")
+            app.state.browser = await launch_browser()
+        return app.state.browser
+
+
+def is_blocked_host(hostname: str) -> bool:
+    """Check if a hostname is, or is a subdomain of, a known ad/analytics host"""
+    parts = hostname.split('.')
+    return any('.'.join(parts[i:]) in BLOCKED_HOSTS for i in range(len(parts) - 1))
+
+
+async def block_unneeded_resources(route: Route):
+    """Abort requests to ad and analytics hosts so the result page settles faster"""
+    # Compare the hostname, not the whole URL: trackers often carry the page URL in their query
+    hostname = urlparse(route.request.url).hostname or ''
+    if is_blocked_host(hostname):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def capture_speedtest_screenshot(browser: Browser, url: str) -> tuple:
+    """Capture screenshot of speedtest result page using a shared browser.
+    
+    Returns:
+        Tuple (screenshot_bytes, found_result) where found_result is False when
+        no result element appeared and the visible viewport was captured instead
+    """
+    # Bounded across all requests so a large batch can't open unbounded pages
+    async with SCREENSHOT_SEM:
+        logger.info(f"Capturing screenshot for: {url}")
         context = await browser.new_context(
             viewport={'width': 1920, 'height': 1080},
             user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         )
-        page = await context.new_page()
         
         try:
+            page = await context.new_page()
+            await page.route("**/*", block_unneeded_resources)
+        
             # Navigate with longer timeout and different wait strategy
             await page.goto(url, wait_until='domcontentloaded', timeout=60000)
-            
+        
             # Wait for page to be ready - try multiple selectors
             try:
                 await page.wait_for_selector('.result-container-speed-test', timeout=15000)
@@ -127,78 +292,140 @@ async def capture_speedtest_screenshot(url: str) -> bytes:
                 except:
                     # If specific selectors fail, just wait a bit for general content
                     await page.wait_for_timeout(5000)
-            
+        
             # Additional wait for any dynamic content
             await page.wait_for_timeout(2000)
-            
-            # Take screenshot
-            screenshot_bytes = await page.screenshot(full_page=True, type='png')
-            return screenshot_bytes
+        
+            # Screenshot only the result card as JPEG; fall back to the visible viewport
+            for selector in ('.result-container-speed-test', '.result-data'):
+                element = await page.query_selector(selector)
+                if element:
+                    return await element.screenshot(type='jpeg', quality=SCREENSHOT_QUALITY), True
+        
+            return await page.screenshot(full_page=False, type='jpeg', quality=SCREENSHOT_QUALITY), False
         finally:
             await context.close()
-            await browser.close()
 
 
-def create_excel_with_screenshots(screenshot_data: List[tuple]) -> str:
+def _screenshot_cache_path(url: str) -> Path:
+    """Cache file for a result URL (results are immutable, so the URL is a stable key)"""
+    key = hashlib.sha256(url.encode()).hexdigest()
+    return SCREENSHOT_CACHE_DIR / f"{key}.jpg"
+
+
+def read_cached_screenshot(url: str) -> Optional[bytes]:
+    """Return cached screenshot bytes for a URL, or None if missing or expired"""
+    path = _screenshot_cache_path(url)
+    try:
+        if time.time() - path.stat().st_mtime > SCREENSHOT_CACHE_TTL:
+            # Remove stale entries so the cache directory doesn't grow forever
+            path.unlink(missing_ok=True)
+            return None
+        return path.read_bytes()
+    except OSError:
+        # Missing or unreadable cache files are treated as a miss
+        return None
+
+
+def write_cached_screenshot(url: str, screenshot_bytes: bytes):
+    """Store screenshot bytes for a URL, replacing the cache file atomically"""
+    path = _screenshot_cache_path(url)
+    tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    try:
+        SCREENSHOT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(screenshot_bytes)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache screenshot for {url}: {str(e)}")
+        # Don't leave a partially written file behind (e.g. disk full)
+        try:
+            tmp_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def _prepare_image(url: str, screenshot_bytes: bytes) -> tuple:
+    """Resize a screenshot to fit in an Excel cell and write it to a temporary file.
+    
+    Args:
+        url: Speedtest result URL the screenshot belongs to
+        screenshot_bytes: Raw screenshot bytes
+    
+    Returns:
+        Tuple (url, image_path) ready to embed in the workbook. The caller is
+        responsible for deleting image_path once the workbook has been saved.
+    """
+    # Opening only reads the header, nothing is decoded yet
+    img = Image.open(io.BytesIO(screenshot_bytes))
+    
+    # Already a JPEG that fits in the cell, embed the original bytes as-is
+    passthrough = img.format == 'JPEG' and img.width <= 400
+    
+    if not passthrough:
+        # Decode before creating the temp file so a corrupt screenshot can't leave one behind.
+        # Let libjpeg downscale during decode, drop any alpha channel (JPEG output needs RGB),
+        # then shrink to fit in cell (approx 400px width)
+        img.draft('RGB', (800, 800))
+        img = img.convert('RGB')
+        img.thumbnail((400, 10_000), Image.Resampling.BILINEAR)
+    
+    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tf:
+        try:
+            if passthrough:
+                tf.write(screenshot_bytes)
+            else:
+                img.save(tf, format='JPEG', quality=82, optimize=False)
+        except Exception:
+            tf.close()
+            Path(tf.name).unlink(missing_ok=True)
+            raise
+    
+    return url, tf.name
+
+
+def create_excel_with_screenshots(image_data: List[tuple]) -> str:
     """Create Excel file with screenshots. 5 images per row, skip column, then next image.
     
     Args:
-        screenshot_data: List of tuples (url, screenshot_bytes)
+        image_data: List of tuples (url, image_path) as returned by _prepare_image
     
     Returns:
         Path to created Excel file
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Speedtest Results"
+    # Write-only mode streams rows to disk instead of keeping every cell in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Speedtest Results")
     
-    # Set column widths and row heights
-    for col in range(1, 50):  # Prepare enough columns
-        ws.column_dimensions[chr(64 + col) if col <= 26 else f"A{chr(64 + col - 26)}"].width = 20
+    # Set column widths (must happen before any rows are written)
+    for col in range(1, 11):  # 5 images per row, each followed by a skipped column
+        ws.column_dimensions[get_column_letter(col)].width = 20
     
     current_row = 1
-    current_col = 1
-    images_in_row = 0
     
-    for idx, (url, screenshot_bytes) in enumerate(screenshot_data):
-        # Process image
-        img = Image.open(io.BytesIO(screenshot_bytes))
+    # 5 images per row, skipping a column after each image
+    for start in range(0, len(image_data), 5):
+        if start:
+            # Leave space for image height before the next row of images
+            for _ in range(29):
+                ws.append([])
+            current_row += 30
         
-        # Resize image to fit in cell (approx 400px width)
-        aspect_ratio = img.height / img.width
-        new_width = 400
-        new_height = int(new_width * aspect_ratio)
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        row_values = []
+        current_col = 1
         
-        # Save to temporary buffer
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-        
-        # Create Excel image
-        xl_img = XLImage(img_buffer)
-        
-        # Calculate cell position
-        # 5 images per row, then skip a column
-        if images_in_row >= 5:
-            current_row += 30  # Move to next row (leave space for image height)
-            current_col = 1
-            images_in_row = 0
-        
-        # Get column letter
-        col_letter = chr(64 + current_col) if current_col <= 26 else f"A{chr(64 + current_col - 26)}"
-        cell_position = f"{col_letter}{current_row}"
-        
-        # Add URL as text in the cell
-        ws[cell_position] = url
-        
-        # Add image
-        xl_img.anchor = cell_position
-        ws.add_image(xl_img)
+        for url, image_path in image_data[start:start + 5]:
+            # Create Excel image (openpyxl streams the file into the archive on wb.save)
+            xl_img = XLImage(image_path)
+            
+            # Add image anchored at the URL's cell
+            xl_img.anchor = f"{get_column_letter(current_col)}{current_row}"
+            ws.add_image(xl_img)
+            
+            # URL as text in the cell, then the skipped column
+            row_values.extend([url, None])
+            current_col += 2
         
-        # Move to next position (skip a column after each image)
-        current_col += 2
-        images_in_row += 1
+        ws.append(row_values)
     
     # Save file
     temp_dir = Path("/tmp/speedtest_results")
@@ -217,17 +444,10 @@ async def process_speedtest(request: SpeedTestRequest):
         raise HTTPException(status_code=400, detail="No URLs provided")
     
     # Validate URLs
-    invalid_urls = []
-    valid_urls = []
-    
-    for url in request.urls:
-        url = url.strip()
-        if not url:
-            continue
-        if validate_speedtest_url(url):
-            valid_urls.append(url)
-        else:
-            invalid_urls.append(url)
+    stripped = [url for url in (u.strip() for u in request.urls) if url]
+    mask = [SPEEDTEST_URL_RE.match(url) is not None for url in stripped]
+    valid_urls = list(itertools.compress(stripped, mask))
+    invalid_urls = list(itertools.compress(stripped, (not m for m in mask)))
     
     if not valid_urls:
         raise HTTPException(
@@ -235,18 +455,36 @@ async def process_speedtest(request: SpeedTestRequest):
             detail="No valid speedtest.net URLs found"
         )
     
-    # Capture screenshots
+    # Capture screenshots concurrently, sharing the app-wide browser
+    async def capture(url: str) -> bytes:
+        cached = await asyncio.to_thread(read_cached_screenshot, url)
+        if cached is not None:
+            logger.info(f"Using cached screenshot for: {url}")
+            return cached
+        
+        # Only cache misses need the browser; launch failures become per-URL errors
+        browser = await get_browser()
+        screenshot_bytes, found_result = await capture_speedtest_screenshot(browser, url)
+        
+        # Only cache real result cards; a fallback capture is likely a consent or error page
+        if found_result:
+            await asyncio.to_thread(write_cached_screenshot, url, screenshot_bytes)
+        return screenshot_bytes
+    
+    results = await asyncio.gather(
+        *[capture(url) for url in valid_urls],
+        return_exceptions=True
+    )
+    
     screenshot_data = []
     errors = []
     
-    for url in valid_urls:
-        try:
-            logger.info(f"Capturing screenshot for: {url}")
-            screenshot_bytes = await capture_speedtest_screenshot(url)
-            screenshot_data.append((url, screenshot_bytes))
-        except Exception as e:
-            logger.error(f"Error capturing {url}: {str(e)}")
-            errors.append(f"Failed to capture {url}: {str(e)}")
+    for url, result in zip(valid_urls, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error capturing {url}: {str(result)}")
+            errors.append(f"Failed to capture {url}: {str(result)}")
+        else:
+            screenshot_data.append((url, result))
     
     if not screenshot_data:
         raise HTTPException(
@@ -255,8 +493,20 @@ async def process_speedtest(request: SpeedTestRequest):
         )
     
     # Create Excel file
+    image_data = []
     try:
-        file_path = create_excel_with_screenshots(screenshot_data)
+        # Resize images in worker threads (Pillow releases the GIL), then assemble off the event loop
+        results = await asyncio.gather(
+            *[asyncio.to_thread(_prepare_image, url, screenshot_bytes)
+              for url, screenshot_bytes in screenshot_data],
+            return_exceptions=True
+        )
+        image_data = [result for result in results if not isinstance(result, Exception)]
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        
+        file_path = await asyncio.to_thread(create_excel_with_screenshots, image_data)
         return {
             "success": True,
             "message": f"Successfully processed {len(screenshot_data)} URLs",
@@ -269,6 +519,10 @@ async def process_speedtest(request: SpeedTestRequest):
             status_code=500,
             detail=f"Error creating Excel file: {str(e)}"
         )
+    finally:
+        # Remove the temporary resized images
+        for _, image_path in image_data:
+            Path(image_path).unlink(missing_ok=True)
 
 
 @api_router.get("/download/{file_name}")
@@ -276,12 +530,20 @@ async def download_file(file_name: str):
     """Download generated Excel file"""
     file_path = Path("/tmp/speedtest_results") / file_name
     
-    if not file_path.exists():
+    try:
+        stat_result = await asyncio.to_thread(file_path.stat)
+    except OSError:
         raise HTTPException(status_code=404, detail="File not found")
     
+    # FileResponse skips its own regular-file check when given stat_result (e.g. for "..")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    # Passing stat_result sets Content-Length up front and skips a second stat in Starlette
     return FileResponse(
         path=str(file_path),
         filename=file_name,
+        stat_result=stat_result,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
@@ -297,6 +559,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup_browser():
+    # Keep a single browser alive for the app lifetime to avoid per-request cold starts.
+    # A failed launch must not stop the app; get_browser() retries on the next capture.
+    app.state.pw = None
+    app.state.browser = None
+    app.state.browser_lock = asyncio.Lock()
+    try:
+        app.state.browser = await launch_browser()
+    except Exception as e:
+        logger.warning(f"Could not launch browser at startup, will retry on first capture: {str(e)}")
+
+async def migrate_status_timestamps():
+    """One-off conversion of ISO-string timestamps written by older versions into BSON dates"""
+    migration_id = "status_checks_bson_timestamps"
+    if await db.migrations.find_one({"_id": migration_id}):
+        return
+    
+    # Unparseable strings are left as they are rather than failing the whole update
+    result = await db.status_checks.update_many(
+        {"timestamp": {"$type": "string"}},
+        [{"$set": {"timestamp": {"$convert": {
+            "input": "$timestamp", "to": "date", "onError": "$timestamp"
+        }}}}]
+    )
+    await db.migrations.insert_one({"_id": migration_id, "applied_at": datetime.now(timezone.utc)})
+    logger.info(f"Converted {result.modified_count} status check timestamps to BSON dates")
+
+@app.on_event("startup")
+async def startup_db_indexes():
+    # MongoDB problems must not stop the app; the screenshot/Excel feature doesn't need it
+    try:
+        await migrate_status_timestamps()
+        
+        # Keep status check lookups on indexes as the collection grows
+        await db.status_checks.create_index([("timestamp", -1)])
+        await db.status_checks.create_index([("client_name", 1), ("timestamp", -1), ("id", 1)])
+    except Exception as e:
+        logger.warning(f"Skipping status_checks migration and indexes: {str(e)}")
+
+@app.on_event("startup")
+async def startup_status_buffer():
+    # Status checks are buffered and inserted in batches instead of one round-trip each
+    app.state.status_buffer = []
+    app.state.status_buffer_since = time.monotonic()
+    app.state.status_lock = asyncio.Lock()
+    app.state.status_flush_stop = asyncio.Event()
+    app.state.status_flush_task = asyncio.create_task(flush_status_buffer_periodically())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Let an in-flight flush finish, then flush the rest, within STATUS_SHUTDOWN_TIMEOUT so an
+    # unreachable MongoDB can't stall shutdown for motor's server-selection timeout
+    app.state.status_flush_stop.set()
+    
+    async def drain():
+        await app.state.status_flush_task
+        await flush_status_buffer()
+    
+    try:
+        await asyncio.wait_for(drain(), STATUS_SHUTDOWN_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"Timed out flushing status checks after {STATUS_SHUTDOWN_TIMEOUT}s at shutdown")
+    
+    # Anything still buffered has no further retry
+    if app.state.status_buffer:
+        logger.error(
+            f"Data loss: {len(app.state.status_buffer)} status checks could not be written "
+            f"to MongoDB before shutdown and were discarded"
+        )
     client.close()
+    if app.state.browser is not None and app.state.browser.is_connected():
+        await app.state.browser.close()
+    if app.state.pw is not None:
+        await app.state.pw.stop()
+
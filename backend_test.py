@@ -1,4 +1,4 @@
-import requests
+import httpx
 import sys
 import json
 from datetime import datetime
@@ -11,11 +11,16 @@ class SpeedtestAPITester:
         self.tests_run = 0
         self.tests_passed = 0
         self.errors = []
+        # Share one connection pool across tests instead of a new TCP+TLS handshake per call
+        self.session = httpx.Client(
+            base_url=self.api_url,
+            headers={'Content-Type': 'application/json'},
+            timeout=30
+        )
 
     def run_test(self, name, method, endpoint, expected_status, data=None, timeout=30):
         """Run a single API test"""
         url = f"{self.api_url}/{endpoint}"
-        headers = {'Content-Type': 'application/json'}
 
         self.tests_run += 1
         print(f"\n🔍 Testing {name}...")
@@ -23,9 +28,9 @@ class SpeedtestAPITester:
         
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=timeout)
+                response = self.session.get(endpoint, timeout=timeout)
             elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=timeout)
+                response = self.session.post(endpoint, json=data, timeout=timeout)
 
             success = response.status_code == expected_status
             if success:
@@ -42,7 +47,7 @@ class SpeedtestAPITester:
                 self.errors.append(f"{name}: {error_msg}")
                 return False, {}
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             error_msg = f"Request timeout after {timeout}s"
             print(f"❌ Failed - {error_msg}")
             self.errors.append(f"{name}: {error_msg}")
@@ -167,6 +172,8 @@ def main():
     print("\n📥 Testing Download...")
     test_results.append(("Download Endpoint", tester.test_download_endpoint()))
     
+    tester.session.close()
+    
     # Print summary
     print("\n" + "=" * 50)
     print("📊 TEST SUMMARY")